@@ -30,11 +30,50 @@ SATURATION_WINDOW_S="${SATURATION_WINDOW_S:-10}"
 RATES="${RATES:-0.5 1 2 4 6 8 10 12 14 16 20 30 40 50 60 80 100}"
 SEED="${SEED:-42}"
 
+# Arrays that may be empty are expanded as ${a[@]+"${a[@]}"}: under set -u,
+# bash before 4.4 treats a plain "${a[@]}" of an empty array as unbound.
+
+# Drop repeated rates (keeping first-seen order): a duplicate would rerun an
+# identical simulation, and two concurrent jobs would write the same files.
+declare -A SEEN_RATES=()
+UNIQUE_RATES=()
+for R in $RATES; do
+  [[ -n "${SEEN_RATES[$R]:-}" ]] && continue
+  SEEN_RATES[$R]=1
+  UNIQUE_RATES+=("$R")
+done
+RATES="${UNIQUE_RATES[*]+"${UNIQUE_RATES[*]}"}"
+
+# Rates are simulated concurrently, at most JOBS at a time. Each blis run is
+# CPU-bound, so oversubscribing cores only adds context-switch overhead.
+NCPU="$(getconf _NPROCESSORS_ONLN 2>/dev/null || echo 4)"
+JOBS="${JOBS:-$NCPU}"
+if [[ ! "$JOBS" =~ ^[1-9][0-9]*$ ]]; then
+  echo "JOBS must be a positive integer, got '$JOBS'" >&2
+  exit 1
+fi
+# RESUME=1 reuses rates already completed in an existing OUT_DIR.
+RESUME="${RESUME:-0}"
+
 # Pass --model-config-folder only if non-empty (allows MODEL_CONFIG_FOLDER="" to disable
 # and force HuggingFace auto-fetch — useful for non-bundled models).
 CFG_ARGS=()
 [[ -n "$MODEL_CONFIG_FOLDER" ]] && CFG_ARGS=(--model-config-folder "$MODEL_CONFIG_FOLDER")
 
+# Flags shared by every run in the sweep; run_blis adds only the per-run ones.
+BLIS_ARGS=(
+  --model "$MODEL"
+  ${CFG_ARGS[@]+"${CFG_ARGS[@]}"}
+  --hardware "$HARDWARE"
+  --tp "$TP"
+  --latency-model "$LATENCY_MODEL"
+  --workload "$WORKLOAD"
+  --num-requests "$NUM_REQUESTS"
+  --horizon "$HORIZON_US"
+  --seed "$SEED"
+  --saturation-window "$SATURATION_WINDOW_S"
+)
+
 OUT_DIR="${OUT_DIR:-results/saturation-$(date +%Y%m%d-%H%M%S)-$$}"
 mkdir -p "$OUT_DIR"
 SUMMARY="$OUT_DIR/summary.csv"
@@ -45,46 +84,121 @@ if [[ ! -x ./blis ]]; then
   go build -o blis main.go
 fi
 
-echo "intended_rate,sustained_throughput,goodput_rps,goodput_vs_intended,timeout_frac,e2e_p99_ms,ttft_p99_ms,still_queued,still_running,drain_ratio_verdict,drain_ratio_rho,slope_based_verdict" > "$SUMMARY"
 printf "Model:    %s (TP=%d, %s)\n" "$MODEL" "$TP" "$HARDWARE"
 printf "Workload: %s\n" "$WORKLOAD"
 printf "Sweeping: %s req/s\n" "$RATES"
+printf "Jobs:     %s in parallel\n" "$JOBS"
 printf "Output:   %s\n\n" "$OUT_DIR"
 
+# The report is written under a .part name and renamed only after blis exits
+# cleanly, so an interrupted run never leaves a truncated report behind.
+# blis runs in the background so run_rate's INT/TERM trap can stop it mid-run.
 run_blis() {
   local rate="$1" classifier="$2" report_path="$3" raw_path="$4" log_path="$5"
-  ./blis run \
-    --model "$MODEL" \
-    "${CFG_ARGS[@]}" \
-    --hardware "$HARDWARE" \
-    --tp "$TP" \
-    --latency-model "$LATENCY_MODEL" \
-    --workload "$WORKLOAD" \
+  GOMAXPROCS="$BLIS_GOMAXPROCS" ./blis run "${BLIS_ARGS[@]}" \
     --rate "$rate" \
-    --num-requests "$NUM_REQUESTS" \
-    --horizon "$HORIZON_US" \
-    --seed "$SEED" \
-    --saturation-window "$SATURATION_WINDOW_S" \
     --saturation-classifier "$classifier" \
-    --saturation-report "$report_path" \
-    > "$raw_path" 2> "$log_path"
+    --saturation-report "$report_path.part" \
+    > "$raw_path" 2> "$log_path" &
+  BLIS_PID=$!
+  wait "$BLIS_PID" || return
+  mv -f "$report_path.part" "$report_path"
 }
 
+# The blis flags a rate's results were produced with, recorded beside them.
+rate_args() {
+  printf '%s\n' "${BLIS_ARGS[*]} --rate $1"
+}
+
+# Prints one progress line when the rate finishes, in completion order.
+# The rate's args stamp is removed up front and rewritten only after both runs
+# succeed, so a partly rerun rate is never mistaken for a finished one.
+run_rate() {
+  local R="$1" stamp="$OUT_DIR/rate-$1.blis-args"
+  trap 'kill "${BLIS_PID:-}" 2>/dev/null; exit 143' INT TERM
+  rm -f "$stamp"
+
+  # Run with drain-ratio (default classifier; throughput numbers come from this run),
+  # then again with slope-based — same workload + seed, only verdict differs.
+  # The slope-based metrics duplicate the drain-ratio run, so its stdout is discarded.
+  if run_blis "$R" "drain-ratio" "$OUT_DIR/rate-${R}.drain-ratio.json" \
+       "$OUT_DIR/rate-${R}.json" "$OUT_DIR/rate-${R}.stderr" \
+    && run_blis "$R" "slope-based" "$OUT_DIR/rate-${R}.slope-based.json" \
+       /dev/null "$OUT_DIR/rate-${R}.slope-based.stderr"; then
+    rm -f "$OUT_DIR/rate-${R}.slope-based.stderr"
+    rate_args "$R" > "$stamp.part"
+    mv -f "$stamp.part" "$stamp"
+    printf "rate=%-5s ... done\n" "$R"
+  else
+    printf "rate=%-5s ... FAILED\n" "$R"
+    return 1
+  fi
+}
+
+# A rate can be reused only if its outputs exist and its args stamp matches
+# the current flags; results from another configuration are re-simulated.
+rate_done() {
+  local R="$1" stamp="$OUT_DIR/rate-$1.blis-args"
+  [[ -s "$OUT_DIR/rate-${R}.json" && -s "$OUT_DIR/rate-${R}.drain-ratio.json" \
+    && -s "$OUT_DIR/rate-${R}.slope-based.json" && -f "$stamp" ]] \
+    && [[ "$(cat "$stamp")" == "$(rate_args "$R")" ]]
+}
+
+# Ctrl-C signals the whole process group. The run_rate subshells catch it, but
+# the blis processes they start in the background have SIGINT ignored, so
+# run_rate forwards INT/TERM to its blis itself; on TERM or an early exit the
+# parent stops the subshells explicitly. Either way nothing is left orphaned.
+trap 'kill $(jobs -p) 2>/dev/null || true' EXIT
+trap 'exit 130' INT
+trap 'exit 143' TERM
+
+TODO_RATES=()
+for R in $RATES; do
+  if [[ "$RESUME" == 1 ]] && rate_done "$R"; then
+    printf "rate=%-5s ... reusing existing results\n" "$R"
+    continue
+  fi
+  TODO_RATES+=("$R")
+done
+
+# The simulation loop is single-threaded; only the Go runtime (GC) fans out.
+# Give each concurrent run its share of the cores so parallel runtimes don't
+# each size their GC workers for the whole machine. An explicit GOMAXPROCS wins.
+CONCURRENCY=$(( ${#TODO_RATES[@]} < JOBS ? ${#TODO_RATES[@]} : JOBS ))
+BLIS_GOMAXPROCS="${GOMAXPROCS:-$(( CONCURRENCY > 0 && NCPU / CONCURRENCY > 0 ? NCPU / CONCURRENCY : 1 ))}"
+
+# Fan out one background job per rate, keeping at most $JOBS in flight.
+PIDS=()
+for R in ${TODO_RATES[@]+"${TODO_RATES[@]}"}; do
+  while (( $(jobs -rp | wc -l) >= JOBS )); do
+    wait -n || true
+  done
+  run_rate "$R" &
+  PIDS+=("$!")
+done
+
+# PIDS is parallel to TODO_RATES. A failed rate is left out of the summary;
+# the rest of the sweep is still collected before the script exits non-zero.
+declare -A FAILED_RATES=()
+for i in ${PIDS[@]+"${!PIDS[@]}"}; do
+  wait "${PIDS[$i]}" || FAILED_RATES[${TODO_RATES[$i]}]=1
+done
+
+# Collect results in sweep order once every run has finished. Rows are
+# buffered and summary.csv is written in a single pass at the end.
+printf "\n"
+ROWS=("intended_rate,sustained_throughput,goodput_rps,goodput_vs_intended,timeout_frac,e2e_p99_ms,ttft_p99_ms,still_queued,still_running,drain_ratio_verdict,drain_ratio_rho,slope_based_verdict")
 for R in $RATES; do
   RAW="$OUT_DIR/rate-${R}.json"
-  LOG="$OUT_DIR/rate-${R}.stderr"
   DR_REPORT="$OUT_DIR/rate-${R}.drain-ratio.json"
   SB_REPORT="$OUT_DIR/rate-${R}.slope-based.json"
 
+  if [[ -n "${FAILED_RATES[$R]:-}" ]]; then
+    printf "rate=%-5s ... FAILED, not in summary\n" "$R"
+    continue
+  fi
   printf "rate=%-5s ... " "$R"
 
-  # Run with drain-ratio (default classifier; throughput numbers come from this run)
-  run_blis "$R" "drain-ratio" "$DR_REPORT" "$RAW" "$LOG"
-
-  # Run again with slope-based classifier — same workload + seed, only verdict differs
-  run_blis "$R" "slope-based" "$SB_REPORT" "$OUT_DIR/.tmp.raw" "$OUT_DIR/.tmp.log"
-  rm -f "$OUT_DIR/.tmp.raw" "$OUT_DIR/.tmp.log"
-
   # Extract throughput stats from the drain-ratio run's stdout JSON
   METRICS=$(awk '/^=== Simulation Metrics ===/{flag=1; next} flag' "$RAW")
   read -r OFF GOOD TIMEOUT_FRAC E2E_P99 TTFT_P99 SQ SR <<<"$(jq -r '
@@ -100,16 +214,27 @@ for R in $RATES; do
     ] | @tsv' <<<"$METRICS")"
 
   # Extract verdicts from the saturation reports
-  DR_VERDICT=$(jq -r .classification "$DR_REPORT")
-  DR_RHO=$(jq -r '.note | capture("ρ ≈ (?<r>[0-9.]+)").r // "n/a"' "$DR_REPORT")
-  SB_VERDICT=$(jq -r .classification "$SB_REPORT")
+  read -r DR_VERDICT DR_RHO SB_VERDICT <<<"$(jq -rs '
+    [
+      .[0].classification,
+      (.[0].note | capture("ρ ≈ (?<r>[0-9.]+)").r // "n/a"),
+      .[1].classification
+    ] | @tsv' "$DR_REPORT" "$SB_REPORT")"
 
-  RATIO=$(echo "scale=4; $GOOD / $R" | bc -l)
+  read -r RATIO RATIO_PCT <<<"$(awk -v g="$GOOD" -v r="$R" \
+    'BEGIN { printf "%.4f %.1f\n", g / r, 100 * g / r }')"
   printf "goodput=%6.2f  ratio=%5.1f%%  ρ=%-5s  drain-ratio: %-23s  slope-based: %s\n" \
-    "$GOOD" "$(echo "$RATIO * 100" | bc -l)" "$DR_RHO" "$DR_VERDICT" "$SB_VERDICT"
+    "$GOOD" "$RATIO_PCT" "$DR_RHO" "$DR_VERDICT" "$SB_VERDICT"
 
-  echo "$R,$OFF,$GOOD,$RATIO,$TIMEOUT_FRAC,$E2E_P99,$TTFT_P99,$SQ,$SR,$DR_VERDICT,$DR_RHO,$SB_VERDICT" >> "$SUMMARY"
+  ROWS+=("$R,$OFF,$GOOD,$RATIO,$TIMEOUT_FRAC,$E2E_P99,$TTFT_P99,$SQ,$SR,$DR_VERDICT,$DR_RHO,$SB_VERDICT")
 done
+printf '%s\n' "${ROWS[@]}" > "$SUMMARY"
+
+if (( ${#FAILED_RATES[@]} )); then
+  echo "One or more blis runs failed; see $OUT_DIR/rate-*.stderr" >&2
+  echo "Summary CSV for the completed rates: $SUMMARY" >&2
+  exit 1
+fi
 
 printf "\nDone. Summary CSV: %s\n" "$SUMMARY"
 printf "Per-rate raw + classifier reports in: %s/\n\n" "$OUT_DIR"